@@ -3,16 +3,24 @@ import os
 import json
 import zipfile
 import datetime
+import time
 import tempfile
 import subprocess
 import platform
+import sys
 import shutil
 import io
+import warnings
 from pathlib import Path
-import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import gc
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # -----------------------------------------------------
 # Helper Code Injection
 # -----------------------------------------------------
@@ -23,27 +31,98 @@ import numpy as np
 import io
 from matplotlib.gridspec import GridSpec, GridSpecFromSubplotSpec
 
-# Load the single data archive
-try:
-    # clipboard() is expected to return the path to the extracted file provided by JEMViewer3
-    _archive_path = clipboard("data.npz")
-    _archive = np.load(_archive_path)
-except Exception as e:
-    print(f"Warning: Could not load data.npz: {e}")
-    _archive = {}
+# Each blob is stored as its own file in clipboard/ (see _BLOB_CODEC)
+# clipboard() is expected to return the path to the extracted file provided by JEMViewer3
+def _blob(name):
+    # Path of the extracted blob file, or an in-memory buffer for zstd blobs
+    if _BLOB_CODEC == "zstd":
+        import zstandard
+        with open(clipboard(f"{name}.zst"), "rb") as f:
+            return io.BytesIO(zstandard.ZstdDecompressor().decompress(f.read()))
+    return clipboard(name)
 
 def _load_npy(key):
-    return _archive[key]
+    src = _blob(f"{key}.npy")
+    if isinstance(src, str):
+        # Copy-on-write memory map: data is only read when it is actually touched
+        return np.load(src, mmap_mode="c")
+    return np.load(src)
 
 def _load_csv(key, **kwargs):
-    # Extract bytes from uint8 array and read as CSV
-    bytes_data = _archive[key].tobytes()
-    return pd.read_csv(io.BytesIO(bytes_data), **kwargs)
+    return pd.read_csv(_blob(f"{key}.csv"), **kwargs)
+
+def _load_feather(key):
+    # Feather keeps dtypes and the index, so no parsing options are needed
+    return pd.read_feather(_blob(f"{key}.feather"))
 """
 
 # 全てのアクティブなプロジェクトを保持するリスト
 _active_projects = []
 
+def _npy_parts(arr):
+    """
+    配列を .npy 形式の断片 [ヘッダ, 本体] に変換します。
+    C連続に揃えた上で、本体はコピーせずバッファのまま返します。
+    (オブジェクト配列は記録時にリテラルになるため blob には含まれません)
+    """
+    arr = np.asarray(arr)
+    if not arr.flags.c_contiguous:
+        arr = np.ascontiguousarray(arr)
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, np.lib.format.header_data_from_array_1_0(arr))
+    return [header.getvalue(), arr.reshape(-1).view(np.uint8)]
+
+def _stored_entry(name):
+    """圧縮せずに格納する zip エントリ (writestr と同じ日時・権限)"""
+    zinfo = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+    zinfo.compress_type = zipfile.ZIP_STORED
+    zinfo.external_attr = 0o600 << 16
+    return zinfo
+
+def _write_blobs(zf, blobs, codec):
+    """
+    blobsの各データを clipboard/{name} として zip のエントリへ直接ストリーム書き込みします。
+    ndarray は .npy 形式で、bytes はそのまま書き込みます。
+    関数として保持されたもの (CSV / feather) はここで呼び出して bytes に変換します。
+    Path はメモリ上限を超えて退避されたファイルで、そのまま流し込みます。
+    codec="zstd" の場合はそれぞれ .zst として個別に圧縮し、
+    "none" の場合は zf の compression / compresslevel で圧縮します。
+    """
+    compressor = zstandard.ZstdCompressor(level=3, threads=-1) if codec == "zstd" else None
+    for name, data in blobs.items():
+        if isinstance(data, Path):
+            with open(data, "rb") as src:
+                size = os.fstat(src.fileno()).st_size
+                _write_entry(zf, name, iter(lambda: src.read(1 << 20), b""), size, compressor)
+            continue
+        if callable(data):
+            parts = [data()]
+        elif isinstance(data, bytes):
+            parts = [data]
+        else:
+            parts = _npy_parts(data)
+        _write_entry(zf, name, parts, sum(len(p) for p in parts), compressor)
+        # 次の blob を変換する間、書き出し済みのバッファを持ち続けない
+        del data, parts
+
+def _write_entry(zf, name, parts, size, compressor):
+    """parts (合計 size バイト) を clipboard/{name} として書き込みます"""
+    name = f"clipboard/{name}"
+    # 2GB 付近を超えるエントリのみ zip64 にする (圧縮しにくいデータで僅かに膨らむ分の余裕を持たせる)
+    force_zip64 = size + size // 16 + 1024 > zipfile.ZIP64_LIMIT
+    if compressor is None:
+        # 外側のzipの圧縮方式 (compression / compresslevel) で書き込む
+        with zf.open(name, "w", force_zip64=force_zip64) as f:
+            for p in parts:
+                f.write(p)
+        return
+    # zstd で圧縮済みなので外側のzipでは再圧縮しない
+    with zf.open(_stored_entry(name + ".zst"), "w", force_zip64=force_zip64) as f:
+        # size を渡してフレームヘッダに元のサイズを記録する (読み込み側の decompress() に必要)
+        with compressor.stream_writer(f, size=size, closefd=False) as zw:
+            for p in parts:
+                zw.write(p)
+
 class Project:
     """
     JPL3のプロジェクト（セッション）クラス。
@@ -78,25 +157,26 @@ class Project:
         else:
             return new_figs
 
-    def save(self, filename, cleanup=True):
+    def save(self, filename, cleanup=True, compression=zipfile.ZIP_DEFLATED, compresslevel=1, pretty=False,
+             blob_codec="none"):
         """
         現在のプロジェクトの内容を.jem3ファイルとして保存します。
+        compression / compresslevel は外側の.jem3 (zip) に適用され、notebook.json と
+        データ (clipboard/ 内のファイル) の両方がこの方式で圧縮されます (blob_codec="zstd" のデータを除く)。
+        pretty=True の場合、notebook.json をインデント付きで書き出します。
+        blob_codec="zstd" の場合、データは個別に zstd で圧縮します (zstandard が必要。
+        読み込む JEMViewer3 側にも zstandard が必要になります)。
         """
+        if blob_codec not in ("none", "zstd"):
+            raise ValueError(f"unknown blob_codec: {blob_codec!r}")
+        if blob_codec == "zstd" and zstandard is None:
+            raise ImportError("blob_codec='zstd' requires the zstandard package (pip install jpl3[zstd])")
         if isinstance(filename, Path):
             filename = str(filename)
 
-        # --- 1. data.npz ---
-        npz_filename = "data.npz"
-        npz_path = os.path.join(self.session.clipboard_dir, npz_filename)
-        
-        if self.session.blobs:
-            np.savez_compressed(npz_path, **self.session.blobs)
-        else:
-            np.savez_compressed(npz_path)
-
-        # --- 2. notebook.json ---
-        setup_code = LOADER_SCRIPT + "\n" + "\n".join(self.session.setup_logs)
-        main_code = "\n".join(self.session.logs)
+        # --- 1. notebook.json ---
+        setup_code = f"_BLOB_CODEC = {blob_codec!r}\n" + LOADER_SCRIPT + "\n" + self.session.setup_logs.getvalue()
+        main_code = self.session.logs.getvalue()
         
         cells = [
             {
@@ -118,25 +198,47 @@ class Project:
             "addons": []
         }
         
-        notebook_path = os.path.join(self.session.temp_dir, "notebook.json")
-        with open(notebook_path, 'w', encoding='utf-8') as f:
-            json.dump(notebook_data, f, indent=4)
+        if pretty:
+            notebook_json = json.dumps(notebook_data, ensure_ascii=False, indent=4)
+        else:
+            notebook_json = json.dumps(notebook_data, ensure_ascii=False, separators=(',', ':'))
+        # ログ全体のコピーを blob の書き出し中まで持ち越さない
+        del setup_code, main_code, cells, notebook_data
             
-        # --- 3. zipファイルの作成 ---
+        # ndarray はコピーせず参照で保持しているため (pandas は記録時のコピー)、
+        # plot 後に書き換えられていれば保存内容が図と食い違う。
+        # 同じ配列を渡した呼び出しは全て同じ blob を読むので、どれも書き換え後の値で再生される
+        changed = self.session.changed_blobs()
+        if changed:
+            warnings.warn(
+                f"{len(changed)} array(s) were modified in place after being plotted; "
+                f"every call that was passed them will replay their current values "
+                f"({', '.join(changed[:5])}). Plot a copy to keep the values at the time of plotting."
+            )
+
+        # --- 2. zipファイルの作成 ---
         if not filename.endswith(".jem3"):
             filename += ".jem3"
             
-        with zipfile.ZipFile(filename, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
-            zf.write(notebook_path, arcname="notebook.json")
-            if os.path.exists(npz_path):
-                zf.write(npz_path, arcname=f"clipboard/{npz_filename}")
+        with zipfile.ZipFile(filename, 'w', compression=compression, compresslevel=compresslevel) as zf:
+            # 一時ファイルを経由せず直接zipのエントリに書き込む
+            with zf.open("notebook.json", "w") as f:
+                f.write(notebook_json.encode('utf-8'))
+            del notebook_json
+            _write_blobs(zf, self.session.blobs, blob_codec)
                     
-        # --- 4. クリーンアップ (インスタンス単位) ---
+        # --- 3. クリーンアップ (インスタンス単位) ---
         if cleanup:
+            self._cleanup()
+
+    def _cleanup(self, collect=True):
+        # pyplot が読み込まれていなければ pyplot 管理下の Figure も存在しない
+        plt = sys.modules.get("matplotlib.pyplot")
+        if plt is not None:
             for fig in self.session.figures:
                 plt.close(fig)
-            self.session.cleanup()
-            # ここでは gc.collect() は呼ばず、呼び出し元に任せるか最後にまとめて行う
+        # 複数プロジェクトをまとめて解放する場合は collect=False とし、呼び出し元で最後に一度だけ gc.collect() する
+        self.session.cleanup(collect=collect)
 
     def show(self):
         """
@@ -147,7 +249,8 @@ class Project:
         
         try:
             # showは破壊的な変更を行わないよう cleanup=False
-            self.save(temp_path, cleanup=False)
+            # ローカルのプレビュー用なので外側のzipは無圧縮で書き出す
+            self.save(temp_path, cleanup=False, compression=zipfile.ZIP_STORED)
             
             current_os = platform.system()
             app_path = None
@@ -230,7 +333,7 @@ def show():
     for proj in _active_projects:
         proj.show()
 
-def save(filename, cleanup=True):
+def save(filename, cleanup=True, compression=zipfile.ZIP_DEFLATED, compresslevel=1, pretty=False, blob_codec="none"):
     """
     全てのアクティブなプロジェクトを保存します。
     ファイル名は {basename}_{project_id}.jem3 となります。
@@ -238,6 +341,11 @@ def save(filename, cleanup=True):
     Args:
         filename (str): ベースとなるファイル名 (例: "output.jem3")
         cleanup (bool): 保存後にリソースを解放するかどうか
+        compression (int): 外側の.jem3に使うzipの圧縮方式 (例: zipfile.ZIP_STORED)。
+            notebook.json とデータの両方に適用される (blob_codec="zstd" のデータを除く)
+        compresslevel (int): compression の圧縮レベル (デフォルトは高速な 1)
+        pretty (bool): notebook.json をインデント付きで書き出すかどうか
+        blob_codec (str): "zstd" でデータを個別に zstd 圧縮する (要 zstandard)。デフォルトの "none" は zip の圧縮のみ
     """
     if not _active_projects:
         print("Warning: No active projects to save.")
@@ -248,14 +356,22 @@ def save(filename, cleanup=True):
     if not ext:
         ext = ".jem3"
     
-    # 全プロジェクトをループして保存
-    for proj in _active_projects:
-        # project.id を使って一意なファイル名を生成
-        target_filename = f"{base}_{proj.id}{ext}"
-        print(f"Saving project {proj.id} to {target_filename}...")
-        proj.save(target_filename, cleanup=cleanup)
+    # 各プロジェクトは別ファイルに書き出すので並列に保存する (zlib / zstd の圧縮中は GIL が解放される)
+    # クリーンアップ (plt.close 等) はスレッドから行わず、全て保存し終えてからまとめて行う
+    futures = []
+    with ThreadPoolExecutor(max_workers=min(8, len(_active_projects))) as ex:
+        for proj in _active_projects:
+            # project.id を使って一意なファイル名を生成
+            target_filename = f"{base}_{proj.id}{ext}"
+            print(f"Saving project {proj.id} to {target_filename}...")
+            futures.append(ex.submit(proj.save, target_filename, cleanup=False, compression=compression, compresslevel=compresslevel, pretty=pretty, blob_codec=blob_codec))
+    for fut in futures:
+        fut.result()
     
     if cleanup:
+        for proj in _active_projects:
+            proj._cleanup(collect=False)
+
         # リストをクリア
         _active_projects.clear()
         
@@ -4,18 +4,132 @@ import zipfile
 import json
 import datetime
 import inspect
-import re
 import warnings
 import tempfile
 import sys
 import io
+import hashlib
+import math
+import pathlib
+import weakref
+import functools
+import gc
+from types import MethodType
 from functools import wraps
 import numpy as np
 import numpy.ma as ma
-import pandas as pd
 from matplotlib.figure import Figure
 from matplotlib.axes import Axes
-from matplotlib.artist import Artist
+
+# -----------------------------------------------------
+# Optional / Lazy Imports
+# -----------------------------------------------------
+
+def _loaded_pandas():
+    """
+    pandas が既に読み込まれていれば返す (未読み込みなら None)。
+    pandas のオブジェクトは利用者が pandas を import しない限り存在しないため、
+    jpl3 自身は pandas を import せず、import jpl3 を軽く保つ。
+    """
+    return sys.modules.get("pandas")
+
+@functools.lru_cache(maxsize=None)
+def _import_pyarrow():
+    """pyarrow を初めて必要になった時点で読み込む (利用できなければ None)"""
+    try:
+        import pyarrow
+        import pyarrow.feather
+    except ImportError:
+        return None
+    return pyarrow
+
+@functools.lru_cache(maxsize=256)
+def _csv_dtype_kind(dtype):
+    """CSV から読み戻すときに型の指定が必要な dtype の種類 ("datetime" / "category" / None)"""
+    import pandas as pd
+    # is_categorical_dtype は pandas 2.1 で非推奨になったため isinstance で判定する
+    if isinstance(dtype, pd.CategoricalDtype):
+        return "category"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    return None
+
+def _plain_values(obj):
+    """
+    Series / Index の値が .npy でそのまま保存できる dtype なら、記録時点の値のコピーを
+    書き換え不可の ndarray として返す (それ以外は None)
+    """
+    dtype = obj.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iufbmM':
+        values = np.array(obj.to_numpy(), copy=True)
+        values.flags.writeable = False
+        return values
+    return None
+
+def _is_frozen(arr):
+    """配列とその元のバッファがどれも書き換え不可か (記録後に内容が変わり得ないか)"""
+    while isinstance(arr, np.ndarray):
+        if arr.flags.writeable:
+            return False
+        arr = arr.base
+    return arr is None or isinstance(arr, bytes)
+
+def _sample_fingerprint(arr):
+    """
+    配列の先頭と末尾の要素 (各 512 個) とメモリ配置から作る軽量な指紋。
+    全体をハッシュせずに in-place の書き換えを (大抵の場合) 検出するためのもの。
+    """
+    n = arr.size
+    k = min(n, 512)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(arr.flat[:k].tobytes())
+    h.update(arr.flat[n - k:].tobytes())
+    return (arr.__array_interface__['data'][0], arr.shape, arr.strides, h.digest())
+
+def _held_only_by(arr, held):
+    """
+    配列 (と元のバッファ) を参照しているのが呼び出し側の held 個の参照だけか。
+    利用者が持っていなければ以後書き換えられることはなく、退避すればメモリも実際に解放される。
+    参照カウントの数え方は Python のバージョンで異なるため、同じ数だけ参照した基準のオブジェクトと比べる
+    """
+    getrefcount = getattr(sys, "getrefcount", None)
+    if getrefcount is None:
+        return False
+    probe = object()
+    holders = [probe] * held
+    while True:
+        if getrefcount(arr) > getrefcount(probe):
+            return False
+        arr = arr.base
+        if not isinstance(arr, np.ndarray):
+            return arr is None or isinstance(arr, bytes)
+        # 元の配列を参照しているのは子の .base だけのはず
+        holders = [probe]
+
+def _float_literal(x):
+    """float / np.floating を再生できるリテラルにする (nan / inf は float('nan') 等)"""
+    x = float(x)
+    if math.isfinite(x):
+        return repr(x)
+    return f"float('{x!r}')"
+
+def _int_literal(x):
+    return str(int(x))
+
+def _bool_literal(x):
+    return str(bool(x))
+
+def _csv_bytes(obj, **kwargs):
+    buf = io.BytesIO()
+    obj.to_csv(buf, **kwargs)
+    # getvalue() は内容を bytes にコピーするので、バッファをそのまま bytes-like として渡す
+    return buf.getbuffer()
+
+def _feather_bytes(pa, table):
+    buf = pa.BufferOutputStream()
+    pa.feather.write_feather(table, buf)
+    # pyarrow のバッファをコピーせずに bytes-like として渡す
+    return memoryview(buf.getvalue())
 
 # -----------------------------------------------------
 # Session Management
@@ -27,24 +141,56 @@ class JPLSession:
     ログ、バイナリデータ、一時ディレクトリを保持する。
     """
     def __init__(self):
-        self.logs = []        # 通常の操作ログ（Cell 2用）
-        self.setup_logs = []  # 初期化・構成ログ（Cell 1用）
+        # ログは1行ずつバッファに書き込み、save() 時の join を不要にする
+        self.logs = io.StringIO()        # 通常の操作ログ（Cell 2用）
+        self.setup_logs = io.StringIO()  # 初期化・構成ログ（Cell 1用）
         self.data_counter = 0
-        self.temp_dir = tempfile.mkdtemp(prefix="jpl3_temp_")
-        self.clipboard_dir = os.path.join(self.temp_dir, "clipboard")
-        os.makedirs(self.clipboard_dir, exist_ok=True)
+        self._temp_dir = None  # 必要になるまで作らない (temp_dir を参照)
         self.figures = []     # このセッションに紐づくFigureリスト
         
         # データを一時ファイルではなくメモリ上に保持する辞書
+        # (ndarray はそのまま、pandas は記録時のコピーを save() 時に CSV / feather へ変換する関数として保持し、直接zipへ書き込む)
         self.blobs = {}
+        # メモリ上に保持する blob の合計サイズの上限 (bytes)。超えた分は古いものから temp_dir に退避する
+        # (利用者がまだ持っている配列は退避してもメモリが減らず、後の書き換えも反映したいので退避しない)
+        self.max_blob_bytes = 256 * 1024 ** 2
+        # メモリ上にある blob の name -> サイズ (挿入順 = LRU 順)
+        self._blob_sizes = {}
+        self._blob_total = 0
+        # 参照のまま保持している配列 blob の name -> 記録時の指紋
+        self._blob_fingerprints = {}
+        # この要素数以下の数値配列はblobにせずリテラルとしてログに埋め込む
+        self.inline_threshold = 64
+        # 同一オブジェクトの再保存を避けるためのメモ (memo_key -> 生成済みの式)
+        self._obj_memo = {}
+        # id の再利用を防ぐため、メモ済みオブジェクトへの強参照を保持する
+        self._obj_refs = {}
+        # memo_key <-> そのオブジェクトのために作った blob 名 (退避時にメモも破棄するため)
+        self._memo_blobs = {}
+        self._blob_memo = {}
+        self._unmemoized_blobs = []
+        # 内容のハッシュ -> その内容を読み込む式 (同じ内容の配列を一度だけ保存する)
+        # 記録後に内容が変わり得ない blob (書き換え不可の配列) だけを登録する
+        self._content_index = {}
+        # 内容の一致を調べる配列のサイズの上限 (bytes)。これより大きい配列は記録時にハッシュしない
+        self.dedup_max_bytes = 64 * 1024 ** 2
+
+    @property
+    def temp_dir(self):
+        """一時ディレクトリ。データは通常メモリ上にあるため、初めて必要になったときに作成する"""
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.mkdtemp(prefix="jpl3_temp_")
+        return self._temp_dir
 
     def add_log(self, command):
         """通常の操作ログを追加"""
-        self.logs.append(command)
+        self.logs.write(command)
+        self.logs.write("\n")
 
     def add_setup_log(self, command):
         """初期化・構成用のログを追加"""
-        self.setup_logs.append(command)
+        self.setup_logs.write(command)
+        self.setup_logs.write("\n")
 
     def get_new_key(self):
         """データ識別のためのユニークキーを発行"""
@@ -52,23 +198,234 @@ class JPLSession:
         self.data_counter += 1
         return key
 
-    def store_blob(self, key, data):
-        """データをメモリ(blobs)に格納"""
-        self.blobs[key] = data
+    def store_blob(self, name, data, nbytes=None):
+        """
+        データをメモリ(blobs)に格納 (name は clipboard/ 内のファイル名)
+        data は ndarray / bytes、または save() 時に呼ばれて bytes-like を返す関数
+        (関数の場合は nbytes にメモリ上のおおよそのサイズを渡す)
+        """
+        if nbytes is None:
+            nbytes = data.nbytes if isinstance(data, np.ndarray) else len(data) if isinstance(data, bytes) else 0
+        self.blobs[name] = data
+        if isinstance(data, np.ndarray) and not data.dtype.hasobject and not _is_frozen(data):
+            # 配列はコピーせず参照のまま持つので、save() 時に in-place で変更されていないか確かめる
+            self._blob_fingerprints[name] = _sample_fingerprint(data)
+        self._blob_sizes[name] = nbytes
+        self._blob_total += nbytes
+        self._unmemoized_blobs.append(name)
+        if self._blob_total > self.max_blob_bytes:
+            self._spill()
+
+    def _spill(self):
+        """
+        使われていない順に blob を temp_dir/spill へ書き出し、メモリ上の合計を上限以下にする。
+        退避するのは以後内容が変わらないものだけ (記録時のコピー、書き換え不可の配列、
+        jpl3 しか参照していない配列) なので、退避の有無で保存される内容は変わらない
+        """
+        spill_dir = None
+        for name in list(self._blob_sizes):
+            if self._blob_total <= self.max_blob_bytes:
+                break
+            data = self.blobs[name]
+            if name in self._blob_fingerprints:
+                # 参照のまま持っている配列: blobs・このローカル変数・(同じオブジェクトなら) メモの参照以外が無いか
+                memo_key = self._blob_memo.get(name)
+                held = 3 if memo_key is not None and self._obj_refs.get(memo_key) is data else 2
+                if not _held_only_by(data, held):
+                    continue
+            if spill_dir is None:
+                spill_dir = os.path.join(self.temp_dir, "spill")
+                os.makedirs(spill_dir, exist_ok=True)
+            if callable(data):
+                data = data()
+            path = pathlib.Path(spill_dir, name)
+            # save() ではこのファイルをそのまま zip へ流し込む
+            with open(path, "wb") as f:
+                if isinstance(data, (bytes, memoryview)):
+                    f.write(data)
+                else:
+                    np.lib.format.write_array(f, np.asarray(data), allow_pickle=False)
+            # 変換したバッファを次の blob の退避まで持ち越さない
+            del data
+            self.blobs[name] = path
+            self._blob_fingerprints.pop(name, None)
+            self._blob_total -= self._blob_sizes.pop(name)
+            # 元のオブジェクトへの参照も手放す (メモが無くなるので再度渡されたら新しい blob になる)
+            memo_key = self._blob_memo.pop(name, None)
+            if memo_key is not None:
+                self._obj_memo.pop(memo_key, None)
+                self._obj_refs.pop(memo_key, None)
+                for other in self._memo_blobs.pop(memo_key, ()):
+                    self._blob_memo.pop(other, None)
+
+    def changed_blobs(self):
+        """
+        記録後に in-place で書き換えられた (と思われる) 配列 blob の名前のリスト。
+        参照のまま保持する blob は書き換え可能な ndarray だけ (pandas 等は記録時のコピー、
+        書き換え不可の配列は内容が変わらない) なので、これで全て確かめられる
+        """
+        return [
+            name for name, fingerprint in self._blob_fingerprints.items()
+            if _sample_fingerprint(self.blobs[name]) != fingerprint
+        ]
+
+    def find_memo(self, memo_key):
+        """同一オブジェクトに対して生成済みの式を返す (未登録なら None)"""
+        expr = self._obj_memo.get(memo_key)
+        if expr is not None:
+            # 使われた blob を LRU の末尾に移す
+            for name in self._memo_blobs.get(memo_key, ()):
+                size = self._blob_sizes.pop(name, None)
+                if size is not None:
+                    self._blob_sizes[name] = size
+        return expr
+
+    def store_memo(self, memo_key, obj, expr):
+        """
+        オブジェクトに対して生成した式 (と、その際に作られた blob) をメモする。
+        memo_key が None のものはメモせず、作られた blob の記録だけを捨てる
+        """
+        names, self._unmemoized_blobs = self._unmemoized_blobs, []
+        if memo_key is None or not names or any(name not in self._blob_sizes for name in names):
+            # 内容の一致で既存の blob を使い回した場合や、既にディスクへ退避された場合は
+            # obj を保持する意味がない (次回も内容で引き当てる)
+            return
+        self._obj_memo[memo_key] = expr
+        self._obj_refs[memo_key] = obj
+        self._memo_blobs[memo_key] = names
+        for name in names:
+            self._blob_memo[name] = memo_key
 
-    def cleanup(self):
-        try:
-            shutil.rmtree(self.temp_dir)
-        except Exception as e:
-            warnings.warn(f"Failed to cleanup temp dir: {e}")
+    def find_content(self, digest):
+        """内容のハッシュが一致する blob を読み込む式を返す (未登録なら None)"""
+        return self._content_index.get(digest)
+
+    def store_content(self, digest, expr):
+        self._content_index[digest] = expr
+
+    def cleanup(self, collect=True):
+        """
+        一時ディレクトリと保持しているデータを解放する。
+        collect=True の場合、Figure / Axes / Artist 間の循環参照を回収するため gc.collect() を一度呼ぶ
+        (複数のセッションをまとめて解放する場合は False にして最後に一度だけ呼ぶ)。
+        """
+        if self._temp_dir is not None:
+            try:
+                shutil.rmtree(self._temp_dir)
+            except Exception as e:
+                warnings.warn(f"Failed to cleanup temp dir: {e}")
+            self._temp_dir = None
         self.blobs.clear()
+        self._blob_sizes.clear()
+        self._blob_total = 0
+        self._blob_fingerprints.clear()
+        self._obj_memo.clear()
+        self._obj_refs.clear()
+        self._memo_blobs.clear()
+        self._blob_memo.clear()
+        self._unmemoized_blobs.clear()
+        self._content_index.clear()
         self.figures.clear()
+        if collect:
+            gc.collect()
 
 # -----------------------------------------------------
 # DecoFigure Class
 # -----------------------------------------------------
 
+# クラス -> 装飾対象の (メソッド名, 共有ラッパー) の組
+_class_method_cache = {}
+# (クラス, メソッド名) -> 共有のラッパー関数
+_wrapper_cache = {}
+# str() がそのまま再生コードになる型
+_PLAIN_SCALAR_TYPES = frozenset({int, bool, type(None)})
+# 呼び出し元のファイル名は同じものが繰り返し現れるので abspath (getcwd を伴う) の結果を使い回す
+_abspath_cached = functools.lru_cache(maxsize=512)(os.path.abspath)
+# メソッドを装飾済みのオブジェクト (matplotlib のオブジェクトに目印の属性を足さずに済ませる)
+_decorated_instances = weakref.WeakSet()
+# id(登録済みオブジェクト) -> 所属する DecoFigure
+_owner_figures = weakref.WeakValueDictionary()
+
+def _wrap_method(cls, name):
+    """
+    (クラス, メソッド名) ごとに1つだけラッパーを作り、全インスタンスで共有する。
+    ラッパーは MethodType でインスタンスに束縛して使い、
+    所属する DecoFigure は _owner_figures から引く。
+    """
+    wrapper = _wrapper_cache.get((cls, name))
+    if wrapper is not None:
+        return wrapper
+
+    raw = inspect.getattr_static(cls, name)
+    if inspect.isfunction(raw):
+        call = raw
+    else:
+        # classmethod / staticmethod 等は記述子プロトコルで束縛してから呼ぶ
+        def call(obj, *args, **kwargs):
+            return raw.__get__(obj, cls)(*args, **kwargs)
+
+    # 子リストを持たないクラス (Line2D 等) のメソッドは子の走査を丸ごと省く
+    scans_children = cls in DecoFigure.childs_tree
+
+    # 呼び出しごとのグローバル / 属性の参照を避けるため、よく使うものをクロージャに取り込んでおく
+    owner_get = _owner_figures.get
+    getframe = sys._getframe
+    abspath = _abspath_cached
+
+    @wraps(getattr(cls, name))
+    def decorate(obj, *args, **kwargs):
+        result = call(obj, *args, **kwargs)
+
+        deco = owner_get(id(obj))
+        if deco is None:
+            return result
+
+        # スクリプト実行時は __main__ から直接呼ばれたものだけを記録する
+        # (inspect.stack() は全フレームのソースを読むため、直前のフレームだけを参照する)
+        if deco._is_interactive or abspath(getframe(1).f_code.co_filename) == deco.call_from:
+            deco._log_call(obj, name, args, kwargs)
+
+        # 戻り値の Artist も obj の子リストに含まれるため、走査は一度で十分
+        if scans_children:
+            deco._scan_and_register_new_artists(obj)
+
+        return result
+
+    decorate._deco_original = raw
+    _wrapper_cache[(cls, name)] = decorate
+    return decorate
+
+def _forget_artist(headers, child_hwm, obj_id):
+    """登録済みオブジェクトが破棄されたとき、その id に紐づく情報を消す (id の再利用対策)"""
+    headers.pop(obj_id, None)
+    _owner_figures.pop(obj_id, None)
+    # 親として持つ記録と、末尾要素として記録されているもの (同じ id の再利用に備える) を消す
+    for key in [k for k, v in child_hwm.items() if k[0] == obj_id or v[1] == obj_id]:
+        del child_hwm[key]
+
+def _detect_call_from():
+    """
+    __main__ のスクリプトの絶対パス (対話モードなら "interactive")。
+    IPython の %run では実行のたびに __main__ が差し替わるため、キャッシュせず Figure ごとに調べる
+    """
+    try:
+        main_file = getattr(sys.modules['__main__'], '__file__', None)
+        if main_file:
+            return sys.intern(os.path.abspath(main_file))
+    except (AttributeError, KeyError, NameError):
+        pass
+    return "interactive"
+
 class DecoFigure(Figure):
+    # 除外リスト (完全一致する名前 / 前方一致する接頭辞)
+    _exclude_exact = frozenset({'sca'})
+    _exclude_prefixes = (
+        '_', 'get_', 'stale_callback', 'draw', 'apply_aspect', 'ArtistList', 'set_id', 'clear', 'clf',
+        # 状態を変更しない問い合わせ用メソッドは再生に不要なのでラップしない
+        'is_', 'has_', 'contains', 'convert_', 'findobj', 'format_', 'have_units', 'in_axes',
+        'pickable', 'properties',
+    )
+
     def __init__(self, session, fig_id, *args, **kwargs):
         """
         session: このFigureが所属するJPLSessionインスタンス
@@ -76,35 +433,32 @@ class DecoFigure(Figure):
         """
         self.session = session  # セッションをインスタンス変数として保持
         self._fig_id = fig_id
-        self.artist_map = {}
-        # 追跡対象のリスト
-        self.childs_tree = {
-            DecoFigure: ['axes'],
-            Axes: ['lines', 'patches', 'collections', 'images', 'texts'],
-        }
-        
+        # id(obj) -> ヘッダ文字列。obj が破棄されると weakref.finalize で取り除かれる
+        self.artist_map_headers = {}
+        # (id(親), 子リスト名) -> 前回走査時の (要素数, 末尾要素の id)
+        # (子リスト名が '_children' のものは Axes._children 全体の署名)
+        self._child_hwm = {}
         # 呼び出し元の特定（対話モードかどうか）
-        try:
-            if hasattr(sys.modules['__main__'], '__file__') and sys.modules['__main__'].__file__:
-                self.call_from = os.path.abspath(sys.modules['__main__'].__file__)
-            else:
-                self.call_from = "interactive"
-        except (AttributeError, KeyError, NameError):
-            self.call_from = "interactive"
+        self.call_from = _detect_call_from()
+        self._is_interactive = self.call_from == "interactive"
         
-        # 除外リスト
-        self.exclude = re.compile(
-            r'get_.*|stale_callback|draw|apply_aspect|ArtistList|set_id|_.*|__.*|clear|clf|sca$'
-        )
+        # 引数シリアライズ用の 型 -> ハンドラ 辞書
+        self._dispatch = self._build_dispatch()
         
         super().__init__(*args, **kwargs)
         self._register_artists_recursive(self, f"figs[{self._fig_id}]")
 
     def _register_artists_recursive(self, obj, header):
-        if obj is None or id(obj) in self.artist_map:
+        if obj is None or id(obj) in self.artist_map_headers:
             return
             
-        self.artist_map[id(obj)] = header
+        self.artist_map_headers[id(obj)] = header
+        _owner_figures[id(obj)] = self
+        try:
+            weakref.finalize(obj, _forget_artist, self.artist_map_headers, self._child_hwm, id(obj))
+        except TypeError:
+            # 弱参照を作れないオブジェクトはそのまま保持する
+            pass
         self._decorate_methods(obj)
         
         obj_type = type(obj)
@@ -119,197 +473,509 @@ class DecoFigure(Figure):
                     pass 
 
     def _decorate_methods(self, obj):
-        if hasattr(obj, '_deco_decorated'):
-            return 
-
-        try:
-            members = inspect.getmembers(obj)
-        except Exception:
+        # 初回アクセス時に遅延でラップするにはクラス側の __getattribute__ を差し替える必要があり、
+        # matplotlib のクラス全体に影響するため行わない。共有ラッパーを束縛するだけなので、
+        # 登録時のコストは Axes の生成時間の 1% 程度に収まっている。
+        if obj in _decorated_instances:
             return
 
-        for name, fn in members:
-            try:
-                if self.exclude.match(name) or not inspect.isroutine(fn):
-                    continue
-                
-                if hasattr(fn, '_deco_original'):
-                    continue 
-
-                setattr(obj, name, self._print_function(name, obj)(fn))
-
-            except Exception:
-                pass
-        
-        setattr(obj, '_deco_decorated', True)
-
-    def _safe_flatten(self, obj):
-        if isinstance(obj, Artist):
-            yield obj
-        elif isinstance(obj, np.ndarray):
-            if obj.dtype == object:
-                for item in obj.flat:
-                    yield from self._safe_flatten(item)
-        elif isinstance(obj, (list, tuple)) or (hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes))):
-            for item in obj:
-                yield from self._safe_flatten(item)
+        cls = type(obj)
+        instance_attrs = getattr(obj, '__dict__', None)
+        if instance_attrs is None:
+            for name, wrapper in self._method_wrappers(cls):
+                try:
+                    setattr(obj, name, MethodType(wrapper, obj))
+                except Exception:
+                    pass
         else:
+            # インスタンス固有に上書きされた属性には手を出さない
+            # (メソッド名はデータ記述子ではないので、setattr を介さず __dict__ に直接書き込める)
+            instance_attrs.update({
+                name: MethodType(wrapper, obj)
+                for name, wrapper in self._method_wrappers(cls)
+                if name not in instance_attrs
+            })
+
+        try:
+            _decorated_instances.add(obj)
+        except TypeError:
+            # 弱参照を作れないオブジェクトは記録しない (再装飾しても束縛済みの名前は飛ばされる)
             pass
 
-    def _print_function(self, name, obj):
-        def wrapper(fn): 
-            @wraps(fn)
-            def decorate(*args, **kwargs):
-                result = fn(*args, **kwargs) 
-                
-                should_log = False
-                if self.call_from == "interactive":
-                    should_log = True
-                else:
+    def _method_wrappers(self, cls):
+        """
+        クラスごとに装飾対象の (メソッド名, 共有ラッパー) の組を一度だけ求めてキャッシュする。
+        インスタンスに対する inspect.getmembers (全プロパティの評価) を避ける。
+        除外名は属性を取り出す前に弾き、残りも getattr_static で調べるので
+        クラスレベルの記述子 (classproperty 等) も評価しない。
+        """
+        pairs = _class_method_cache.get(cls)
+        if pairs is None:
+            pairs = []
+            for name in dir(cls):
+                if name in self._exclude_exact or name.startswith(self._exclude_prefixes):
+                    continue
+                if inspect.isroutine(inspect.getattr_static(cls, name, None)):
                     try:
-                        stack = inspect.stack()
-                        caller_frame = stack[1]
-                        caller_file = caller_frame.filename
-                        if caller_file and os.path.abspath(caller_file) == self.call_from:
-                             should_log = True
+                        pairs.append((name, _wrap_method(cls, name)))
                     except Exception:
                         pass
-                
-                if should_log:
-                    header = self._header(obj)
-                    if header: 
-                        func_name = f"{header}.{name}"
-                        # self.session を使用してログを記録
-                        command = self._save_emulate_command(func_name, *args, **kwargs)
-                        self.session.add_log(command)
-                
-                self._scan_and_register_new_artists(obj)
-                
-                if result is not None:
-                    for item in self._safe_flatten(result):
-                        if isinstance(item, Artist):
-                            self._scan_and_register_new_artists(obj)
-
-                return result
-
-            decorate._deco_original = fn 
-            return decorate
-        return wrapper
+            pairs = tuple(pairs)
+            _class_method_cache[cls] = pairs
+        return pairs
+
+    def _log_call(self, obj, name, args, kwargs):
+        header = self._header(obj)
+        if header: 
+            func_name = f"{header}.{name}"
+            # self.session を使用してログを記録
+            command = self._save_emulate_command(func_name, *args, **kwargs)
+            self.session.add_log(command)
 
     def _scan_and_register_new_artists(self, obj):
+        obj_type = type(obj)
+        if obj_type not in self.childs_tree:
+            return
+
         obj_header = self._header(obj)
         if not obj_header:
             return
 
-        obj_type = type(obj)
-        if obj_type in self.childs_tree:
-            for child_list_name in self.childs_tree[obj_type]:
-                try:
-                    child_list = getattr(obj, child_list_name)
-                    for i, child in enumerate(child_list):
-                        if id(child) not in self.artist_map:
-                            child_header = f"{obj_header}.{child_list_name}[{i}]"
-                            self._register_artists_recursive(child, child_header)
-                except AttributeError:
-                    pass
+        # Axes の各子リストは _children をフィルタした view なので、
+        # 元の _children が前回から変わっていなければ (大半の呼び出し) O(1) で打ち切る
+        all_children = getattr(obj, '_children', None)
+        sig_key = None
+        appended = None
+        if type(all_children) is list:
+            n_all = len(all_children)
+            sig = (n_all, id(all_children[-1]) if n_all else None)
+            sig_key = (id(obj), '_children')
+            prev_sig = self._child_hwm.get(sig_key)
+            if prev_sig == sig:
+                return
+            if prev_sig is not None and n_all > prev_sig[0] and (
+                    prev_sig[0] == 0 or id(all_children[prev_sig[0] - 1]) == prev_sig[1]):
+                # 末尾への追加のみ -> 追加された要素だけを各子リストに振り分ける
+                appended = all_children[prev_sig[0]:]
+
+        for child_list_name in self.childs_tree[obj_type]:
+            try:
+                child_list = getattr(obj, child_list_name)
+            except AttributeError:
+                continue
+            hwm_key = (id(obj), child_list_name)
+            # 前回の走査時の (要素数, 末尾要素の id)
+            hwm = self._child_hwm.get(hwm_key)
+            type_check = getattr(child_list, '_type_check', None)
+            if appended is not None and hwm is not None and type_check is not None:
+                added = [child for child in appended if type_check(child)]
+                if added:
+                    self._register_children(obj_header, child_list_name, added, hwm[0])
+                    self._child_hwm[hwm_key] = (hwm[0] + len(added), id(added[-1]))
+                continue
+
+            # Axes の子リストは毎回フィルタする ArtistList なので一度だけ list 化する
+            children = list(child_list)
+            n = len(children)
+            last_id = id(children[-1]) if n else None
+            if hwm == (n, last_id):
+                continue
+            prev_n, prev_last_id = hwm or (0, None)
+            if n > prev_n and (prev_n == 0 or id(children[prev_n - 1]) == prev_last_id):
+                # 末尾への追加のみ -> 追加分だけを調べる
+                start = prev_n
+            else:
+                # 削除や入れ替えがあった場合は先頭から調べ直す
+                start = 0
+            self._register_children(obj_header, child_list_name, children[start:], start)
+            self._child_hwm[hwm_key] = (n, last_id)
+
+        if sig_key is not None:
+            self._child_hwm[sig_key] = sig
+
+    def _register_children(self, obj_header, child_list_name, children, start):
+        """children[i] を {obj_header}.{child_list_name}[start + i] として登録する"""
+        for i, child in enumerate(children, start):
+            if id(child) not in self.artist_map_headers:
+                child_header = f"{obj_header}.{child_list_name}[{i}]"
+                self._register_artists_recursive(child, child_header)
     
     def _header(self, obj):
         obj_id = id(obj)
-        return self.artist_map.get(obj_id, None)
+        return self.artist_map_headers.get(obj_id, None)
 
     # ---------------------------------------------------------
     # Argument Emulation (Serializer)
     # ---------------------------------------------------------
     
-    def _to_csv_bytes(self, obj, **kwargs):
-        buf = io.BytesIO()
-        obj.to_csv(buf, **kwargs)
-        return np.frombuffer(buf.getvalue(), dtype=np.uint8)
+    def _store_csv(self, key, obj, **kwargs):
+        """
+        obj のコピーを {key}.csv として保持し、save() 時に CSV へ変換する。
+        ログのたびに文字列化するコストを避けつつ、記録後の in-place の書き換えは反映しない。
+        """
+        obj = obj.copy(deep=True)
+        nbytes = int(np.sum(obj.memory_usage(index=True)))
+        self.session.store_blob(f"{key}.csv", functools.partial(_csv_bytes, obj, **kwargs), nbytes=nbytes)
 
-    def _emulate_args(self, x):
-        # self.session を使用
+    def _memo_key(self, x):
+        """
+        ndarray はバッファ位置で識別し、同じメモリを指すビューをまとめる。
+        pandas 等は記録時のコピーを保存するため、同一オブジェクトでも後から書き換えられていれば
+        別の内容になる。メモせずに毎回保存する (None を返す)。
+        """
+        if type(x) is np.ndarray:
+            return (x.__array_interface__['data'][0], x.shape, x.strides, x.dtype.str)
+        return None
+
+    def _emulate_blob(self, x):
+        if isinstance(x, ma.MaskedArray):
+            return f'np.ma.MaskedArray(data={self._store_npy(x.data)}, mask={self._store_npy(x.mask)})'
+
+        if isinstance(x, np.ndarray):
+            return self._store_npy(x)
+
+        # pandas オブジェクトは pyarrow があれば dtype ごと保存できる feather を優先する
+        pa = _import_pyarrow()
+        if pa is not None:
+            expr = self._emulate_feather(pa, x)
+            if expr is not None:
+                return expr
+        # 数値だけからなるものは .npy の組として保存し、CSV の文字列化を避ける
+        expr = self._emulate_numeric(x)
+        if expr is not None:
+            return expr
+        return self._emulate_csv(x)
+
+    def _emulate_numeric(self, x):
+        """
+        数値 (datetime64 / timedelta64 を含む) の列とインデックスだけからなる
+        Series / DataFrame / Index を .npy で保存する。対象外の場合は None を返す。
+        """
+        import pandas as pd
+        if isinstance(x, pd.Index):
+            return self._index_expr(x)
+
+        if isinstance(x, pd.Series):
+            values = _plain_values(x)
+            index = self._index_expr(x.index)
+            if values is None or index is None:
+                return None
+            return f"pd.Series({self._emulate_args(values)}, index={index}, name={self._emulate_args(x.name)})"
+
+        if isinstance(x, pd.DataFrame):
+            columns = x.columns
+            if type(columns) is not pd.Index or not columns.is_unique:
+                return None
+            index = self._index_expr(x.index)
+            if index is None:
+                return None
+            items = []
+            for name in columns:
+                values = _plain_values(x[name])
+                if values is None:
+                    return None
+                items.append(f"{self._emulate_args(name)}: {self._emulate_args(values)}")
+            return f"pd.DataFrame({{{', '.join(items)}}}, index={index})"
+
+        return None
+
+    def _index_expr(self, index):
+        import pandas as pd
+        name = self._emulate_args(index.name)
+        if type(index) is pd.RangeIndex:
+            return f"pd.RangeIndex({index.start}, {index.stop}, {index.step}, name={name})"
+        if isinstance(index, pd.MultiIndex):
+            return None
+        values = _plain_values(index)
+        if values is None:
+            return None
+        return f"pd.Index({self._emulate_args(values)}, name={name})"
+
+    def _store_npy(self, arr):
+        """
+        配列を {key}.npy として保持し、読み込む式を返す。
+        書き換え不可の配列は、内容が同じもの (pandas の列と Series 等) が既にあればその blob を使い回す。
+        書き換えられる配列は参照のまま保持しているため、使い回すと後の書き換えが別のプロットにも及ぶ。
+        オブジェクト配列 (datetime.date の配列等) は .npy にできない (pickle が必要) ため、要素を並べたリテラルにする
+        """
         session = self.session
-        
-        # 1. 登録済みアーティスト
-        header = self._header(x)
-        if header:
-            return header
+        arr = np.asarray(arr)
+        if arr.dtype.hasobject:
+            return f"np.array({self._emulate_args(arr.tolist())}, dtype=object)"
+        digest = None
+        if (arr.flags.c_contiguous
+                and arr.nbytes <= session.dedup_max_bytes and _is_frozen(arr)):
+            # ハッシュのためだけにコピーしないよう、C 連続の配列だけをそのままバイト列として見る
+            flat = arr.reshape(-1).view(np.uint8)
+            h = hashlib.blake2b(digest_size=16)
+            h.update(f"{arr.dtype.str}{arr.shape}".encode())
+            h.update(flat)
+            digest = h.digest()
+            expr = session.find_content(digest)
+            if expr is not None:
+                return expr
+
+        key = session.get_new_key()
+        session.store_blob(f"{key}.npy", arr)
+        expr = f'_load_npy("{key}")'
+        if digest is not None:
+            session.store_content(digest, expr)
+        return expr
+
+    def _emulate_feather(self, pa, x):
+        """feather で保存できない場合は None を返す (CSV にフォールバック)"""
+        import pandas as pd
+        session = self.session
+        if isinstance(x, pd.DataFrame):
+            # 列名が文字列でないと往復で復元できない
+            if not all(isinstance(c, str) for c in x.columns):
+                return None
+            frame, suffix = x, ''
+        elif isinstance(x, pd.Series):
+            frame, suffix = x.to_frame(), '.iloc[:, 0]'
+            if x.name is None:
+                suffix += '.rename(None)'
+        elif isinstance(x, pd.DatetimeIndex):
+            frame, suffix = pd.DataFrame(index=x), '.index'
+        else:
+            frame, suffix = pd.Series(x).to_frame(), '.iloc[:, 0]'
 
         try:
-            # 2. ファイル保存が必要な型 -> メモリ上のblobsに保存
-            if isinstance(x, ma.MaskedArray):
-                d_key = session.get_new_key()
-                m_key = session.get_new_key()
-                session.store_blob(d_key, x.data)
-                session.store_blob(m_key, x.mask)
-                return f'np.ma.MaskedArray(data=_load_npy("{d_key}"), mask=_load_npy("{m_key}"))'
-
-            if isinstance(x, np.ndarray):
-                key = session.get_new_key()
-                session.store_blob(key, x)
-                return f'_load_npy("{key}")'
-
-            if isinstance(x, pd.Series):
-                key = session.get_new_key()
-                session.store_blob(key, self._to_csv_bytes(x, index=True, header=True))
-                
-                if pd.api.types.is_datetime64_any_dtype(x.dtype):
-                    return f'_load_csv("{key}", index_col=0, header=0, parse_dates=[{x.name!r}]).squeeze("columns")'
-                elif pd.api.types.is_categorical_dtype(x.dtype):
-                    return f'_load_csv("{key}", index_col=0, header=0).squeeze("columns").astype("category")'
-                else:
-                    return f'_load_csv("{key}", index_col=0, header=0).squeeze("columns")'
-
-            if isinstance(x, pd.DataFrame):
-                key = session.get_new_key()
-                session.store_blob(key, self._to_csv_bytes(x, index=True))
-                return f'_load_csv("{key}", index_col=0)'
-                
-            if isinstance(x, pd.DatetimeIndex):
-                key = session.get_new_key()
-                session.store_blob(key, self._to_csv_bytes(pd.Series(x), index=True, header=False))
-                return f'_load_csv("{key}", index_col=0, header=None, parse_dates=True).index'
-
-            if isinstance(x, (pd.Categorical, pd.CategoricalIndex)):
-                key = session.get_new_key()
-                session.store_blob(key, self._to_csv_bytes(pd.Series(x), index=False, header=True))
-                return f'_load_csv("{key}", header=0).squeeze("columns").astype("category")'
+            # 変換できるかどうかはここで確かめ、feather への書き出しは save() 時に行う。
+            # 数値列は pandas のバッファを共有したまま Table になるため、記録時点の値を
+            # 残すよう先にコピーを取る (copy-on-write が有効でも in-place の代入は共有先に及ぶ)
+            table = pa.Table.from_pandas(frame.copy(deep=True), preserve_index=True)
+        except (pa.ArrowException, TypeError, ValueError):
+            return None
+
+        key = session.get_new_key()
+        session.store_blob(f"{key}.feather", functools.partial(_feather_bytes, pa, table), nbytes=table.nbytes)
+        return f'_load_feather("{key}"){suffix}'
+
+    def _emulate_csv(self, x):
+        import pandas as pd
+        session = self.session
+        if isinstance(x, pd.Series):
+            key = session.get_new_key()
+            self._store_csv(key, x, index=True, header=True)
+            
+            dtype_kind = _csv_dtype_kind(x.dtype)
+            if dtype_kind == "datetime":
+                return f'_load_csv("{key}", index_col=0, header=0, parse_dates=[{x.name!r}]).squeeze("columns")'
+            elif dtype_kind == "category":
+                return f'_load_csv("{key}", index_col=0, header=0).squeeze("columns").astype("category")'
+            else:
+                return f'_load_csv("{key}", index_col=0, header=0).squeeze("columns")'
 
-            # 3. 基本型
-            typ = type(x)
-            if typ in (int, float, bool, type(None)):
-                return str(x)
-            if typ == str:
-                return repr(x)
+        if isinstance(x, pd.DataFrame):
+            key = session.get_new_key()
+            self._store_csv(key, x, index=True)
+            return f'_load_csv("{key}", index_col=0)'
+            
+        if isinstance(x, pd.DatetimeIndex):
+            key = session.get_new_key()
+            self._store_csv(key, pd.Series(x), index=True, header=False)
+            return f'_load_csv("{key}", index_col=0, header=None, parse_dates=True).index'
 
-            # 4. 再生可能なコンストラクタ
-            if isinstance(x, datetime.datetime):
-                return repr(x)
-            if isinstance(x, datetime.date):
-                return repr(x)
-            if isinstance(x, pd.Timestamp):
-                return f'pd.Timestamp("{x.isoformat()}")'
-
-            # 5. コンテナ (再帰)
-            if typ == list:
-                return f"[{', '.join(self._emulate_args(item) for item in x)}]"
-            if typ == tuple:
-                items_str = ', '.join(self._emulate_args(item) for item in x)
-                if len(x) == 1: items_str += ','
-                return f"({items_str})"
-            if typ == dict:
-                return f"{{{', '.join(f'{self._emulate_args(k)}: {self._emulate_args(v)}' for k, v in x.items())}}}"
-                
-            # 6. フォールバック
-            return repr(x)
+        if isinstance(x, (pd.Categorical, pd.CategoricalIndex)):
+            key = session.get_new_key()
+            self._store_csv(key, pd.Series(x), index=False, header=True)
+            return f'_load_csv("{key}", header=0).squeeze("columns").astype("category")'
+
+        raise TypeError(f"unsupported blob type: {type(x)}")
+
+    def _emulate_args(self, x):
+        out = []
+        self._write_arg(x, out)
+        return ''.join(out)
+
+    def _write_arg(self, x, out):
+        """x の再生コードを out (文字列のリスト) に追記する。最後に一度だけ join する"""
+        typ = type(x)
+        # 3. 基本型は最も多いので、ディスパッチや例外処理を経由せずにその場で書き出す
+        if typ is str:
+            out.append(repr(x))
+        elif typ in _PLAIN_SCALAR_TYPES:
+            out.append(str(x))
+        elif typ is float:
+            out.append(_float_literal(x))
+        # 5. コンテナ (再帰)
+        elif typ is list:
+            out.append('[')
+            self._write_items(x, out, ', ')
+            out.append(']')
+        elif typ is tuple:
+            out.append('(')
+            self._write_items(x, out, ', ')
+            if len(x) == 1:
+                out.append(',')
+            out.append(')')
+        elif typ is dict:
+            out.append('{')
+            sep = None
+            for k, v in x.items():
+                if sep:
+                    out.append(sep)
+                sep = ', '
+                self._write_arg(k, out)
+                out.append(': ')
+                self._write_arg(v, out)
+            out.append('}')
+        else:
+            out.append(self._emulate_scalar(x))
+
+    def _write_items(self, items, out, sep):
+        first = True
+        for item in items:
+            if not first:
+                out.append(sep)
+            first = False
+            self._write_arg(item, out)
+
+    def _emulate_scalar(self, x):
+        # 完全一致する型は辞書で直接ディスパッチする (isinstance の連鎖を避ける)
+        handler = self._dispatch.get(type(x))
+
+        try:
+            if handler is None:
+                # 1. 登録済みアーティスト
+                header = self._header(x)
+                if header:
+                    return header
+                handler = self._fallback_handler(x)
+            return handler(x)
 
         except Exception as e:
             warnings.warn(f"emulate_args failed for type {type(x)}: {e}")
             return f'"<unserializable object: {type(x).__name__}>"'
 
+    def _build_dispatch(self):
+        dispatch = {
+            # 2. ファイル保存が必要な型 -> メモリ上のblobsに保存
+            ma.MaskedArray: self._emit_blob,
+            np.ndarray: self._emit_blob,
+            # 3. 基本型
+            int: str,
+            float: _float_literal,
+            bool: str,
+            type(None): str,
+            str: repr,
+            # numpy のスカラー (repr は np.float64(1.5) のようになるので Python の値として書き出す)
+            np.float64: _float_literal,
+            np.float32: _float_literal,
+            np.int64: _int_literal,
+            np.int32: _int_literal,
+            np.bool_: _bool_literal,
+            # 4. 再生可能なコンストラクタ
+            datetime.datetime: repr,
+            datetime.date: repr,
+        }
+        pd = _loaded_pandas()
+        if pd is not None:
+            dispatch.update(self._pandas_handlers(pd))
+        return dispatch
+
+    def _pandas_handlers(self, pd):
+        return {
+            pd.Series: self._emit_blob,
+            pd.DataFrame: self._emit_blob,
+            pd.DatetimeIndex: self._emit_blob,
+            pd.Categorical: self._emit_blob,
+            pd.CategoricalIndex: self._emit_blob,
+            pd.Timestamp: self._emit_timestamp,
+        }
+
+    def _fallback_handler(self, x):
+        """辞書に無い型 (サブクラス等) のハンドラを isinstance で決める"""
+        if isinstance(x, np.ndarray):
+            return self._emit_blob
+        if isinstance(x, np.floating):
+            return _float_literal
+        if isinstance(x, np.integer):
+            return _int_literal
+        pd = _loaded_pandas()
+        if pd is not None:
+            if pd.Series not in self._dispatch:
+                # Figure 作成後に pandas が import された
+                self._dispatch.update(self._pandas_handlers(pd))
+                handler = self._dispatch.get(type(x))
+                if handler is not None:
+                    return handler
+            if isinstance(x, (pd.Series, pd.DataFrame, pd.DatetimeIndex,
+                              pd.Categorical, pd.CategoricalIndex)):
+                return self._emit_blob
+            # pd.Timestamp は datetime.datetime のサブクラスなので先に判定する
+            if isinstance(x, pd.Timestamp):
+                return self._emit_timestamp
+        # 6. フォールバック
+        return repr
+
+    def _emit_blob(self, x):
+        # 小さな数値データはblobにせずリテラルとして埋め込む
+        expr = self._emit_inline(x)
+        if expr is not None:
+            return expr
+
+        # 同一オブジェクトは既存のblobを使い回す
+        session = self.session
+        memo_key = self._memo_key(x)
+        expr = None if memo_key is None else session.find_memo(memo_key)
+        if expr is None:
+            expr = self._emulate_blob(x)
+            session.store_memo(memo_key, x, expr)
+        return expr
+
+    def _emit_inline(self, x):
+        """
+        要素数が inline_threshold 以下の数値配列を np.array(...) リテラルに変換する。
+        対象外の場合は None を返す。
+        """
+        typ = type(x)
+        if typ is np.ndarray:
+            return self._inline_array(x)
+        if typ is ma.MaskedArray:
+            data = self._inline_array(ma.getdata(x))
+            if data is None:
+                return None
+            return f"np.ma.MaskedArray(data={data}, mask={ma.getmaskarray(x).tolist()!r})"
+        pd = _loaded_pandas()
+        if pd is not None and typ is pd.Series and isinstance(x.dtype, np.dtype):
+            # 既定の RangeIndex を持つ Series のみ (インデックスを復元する必要がない)
+            index = x.index
+            if not (isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1):
+                return None
+            data = self._inline_array(x.to_numpy())
+            if data is None:
+                return None
+            return f"pd.Series({data}, name={self._emulate_args(x.name)})"
+        return None
+
+    def _inline_array(self, arr):
+        if not (0 < arr.size <= self.session.inline_threshold) or arr.dtype.kind not in 'iufb':
+            return None
+        # nan / inf はリテラルとして再生できない
+        if arr.dtype.kind == 'f' and not np.isfinite(arr).all():
+            return None
+        return f"np.array({arr.tolist()!r}, dtype={arr.dtype.name!r})"
+
+    def _emit_timestamp(self, x):
+        return f'pd.Timestamp("{x.isoformat()}")'
+
     def _save_emulate_command(self, function_name, *args, **kwargs):
-        str_args = []
-        for arg in args:
-            str_args.append(self._emulate_args(arg))
+        out = [function_name, '(']
+        self._write_items(args, out, ',')
+        sep = ',' if args else None
         for k, v in kwargs.items():
-            str_args.append(f"{k} = {self._emulate_args(v)}")
-        return f"{function_name}({','.join(str_args)})"
\ No newline at end of file
+            if sep:
+                out.append(sep)
+            sep = ','
+            out.append(f"{k} = ")
+            self._write_arg(v, out)
+        out.append(')')
+        return ''.join(out)
+
+# 追跡対象のリスト (DecoFigure 自身を参照するのでクラス定義の後で設定する)
+DecoFigure.childs_tree = {
+    DecoFigure: ['axes'],
+    Axes: ['lines', 'patches', 'collections', 'images', 'texts'],
+}
@@ -11,5 +11,9 @@ setup(
         "numpy",
         "pandas",
     ],
+    extras_require={
+        "zstd": ["zstandard"],
+        "feather": ["pyarrow"],
+    },
     python_requires=">=3.9",
 )
\ No newline at end of file
@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import datetime
+import pathlib
+import shutil
+import tempfile
+import types
+import unittest
+import zipfile
+from unittest import mock
+
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.figure import Figure
+import numpy as np
+import pandas as pd
+
+import jpl3
+
+
+def lines_data(fig):
+    """Figure の各 Axes の線の (x, y) を単位変換後の数値の配列として返す"""
+    return [[np.array(line.get_xydata(), dtype=float) for line in ax.lines] for ax in fig.axes]
+
+
+def replay(path):
+    """JEMViewer3 と同じ手順で .jem3 の各セルを実行し、再生された各 Figure の線のデータを返す"""
+    tmp = tempfile.mkdtemp()
+    try:
+        with zipfile.ZipFile(path) as zf:
+            zf.extractall(tmp)
+        with open(os.path.join(tmp, "notebook.json"), encoding="utf-8") as f:
+            notebook = json.load(f)
+        figs = [Figure()]
+        env = {
+            "clipboard": lambda name: os.path.join(tmp, "clipboard", name),
+            "figs": figs,
+            "add_figure": lambda: figs.append(Figure()),
+        }
+        for cell in notebook["cells"]:
+            exec(cell["code"], env)
+        # mmap されたデータを読み終えてから一時ディレクトリを消す
+        return [lines_data(fig) for fig in figs]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.project = jpl3.Project()
+        self.fig = self.project.figure()
+        # テストランナー経由でもこのファイルからの呼び出しを記録させる
+        self.fig.call_from = os.path.abspath(__file__)
+        self.path = tempfile.mktemp(suffix=".jem3")
+
+    def tearDown(self):
+        self.project._cleanup()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def save_and_replay(self):
+        self.project.save(self.path, cleanup=False)
+        return replay(self.path)[0]
+
+    def assert_lines(self, lines, expected):
+        self.assertEqual(len(lines), len(expected))
+        for got, want in zip(lines, expected):
+            np.testing.assert_array_equal(got[:, 1], want)
+
+    def assert_round_trip(self, *calls):
+        """各呼び出しの引数で plot したものが、そのまま plot した場合と同じ線として再生されるか"""
+        axs = self.fig.subplots(1, len(calls), squeeze=False)[0]
+        plain = Figure().subplots(1, len(calls), squeeze=False)[0]
+        for ax, ref, args in zip(axs, plain, calls):
+            ax.plot(*args)
+            ref.plot(*args)
+        got = self.save_and_replay()
+        want = lines_data(plain[0].figure)
+        self.assertEqual(len(got), len(want))
+        for got_lines, want_lines in zip(got, want):
+            self.assertEqual(len(got_lines), len(want_lines))
+            for g, w in zip(got_lines, want_lines):
+                np.testing.assert_array_equal(g, w)
+
+    def test_equal_array_after_in_place_edit(self):
+        # 書き換えられた配列の blob に、書き換え前と同じ内容の別の配列を重ねない
+        ax = self.fig.subplots()
+        y = np.zeros(100)
+        ax.plot(y)
+        y[:] = 5
+        z = np.zeros(100)
+        ax.plot(z)
+        with self.assertWarns(UserWarning):
+            axes = self.save_and_replay()
+        self.assert_lines(axes[0], [np.full(100, 5.0), np.zeros(100)])
+
+    def test_pandas_after_in_place_edit(self):
+        # pandas は記録時点の値で再生される (後の列と内容が一致しても書き換え後の値を使わない)
+        axs = self.fig.subplots(1, 3)
+        s = pd.Series(np.ones(100))
+        axs[0].plot(s)
+        s[:] = 9
+        axs[0].plot(pd.DataFrame({"c": np.ones(100)}))
+        df = pd.DataFrame({"a": np.arange(100.0)})
+        axs[1].plot(df)
+        df.loc[:, "a"] = 7
+        s2 = pd.Series(np.arange(100.0))
+        axs[2].plot(s2)
+        s2 += 1000
+        axs[2].plot(s2)
+        axes = self.save_and_replay()
+        self.assert_lines(axes[0], [np.ones(100), np.ones(100)])
+        self.assert_lines(axes[1], [np.arange(100.0)])
+        self.assert_lines(axes[2], [np.arange(100.0), np.arange(100.0) + 1000])
+
+    def test_object_array(self):
+        # オブジェクト配列は .npy にできないので、保存を止めずにリテラルとして再生する
+        ax = self.fig.subplots()
+        dates = [datetime.date(2025, 1, 1) + datetime.timedelta(days=i) for i in range(100)]
+        ax.plot(np.array(dates, dtype=object), np.arange(100.0))
+        self.project.save(self.path, cleanup=False)
+        self.assert_lines(replay(self.path)[0][0], [np.arange(100.0)])
+
+    @unittest.skipIf(jpl3.zstandard is None, "zstandard is not installed")
+    def test_spill(self):
+        # メモリ上限を超えて退避しても、退避しなかった場合と同じ内容で再生される
+        self.project.session.max_blob_bytes = 1000
+        ax = self.fig.subplots()
+        for i in range(5):
+            ax.plot(np.full(500, float(i)))
+        kept = np.zeros(500)
+        ax.plot(kept)
+        ax.plot(pd.Series(np.arange(500.0)))
+        kept[:] = 7
+        blobs = self.project.session.blobs
+        # jpl3 しか持っていない配列は退避し、利用者が持っている配列はメモリに残す
+        self.assertIsInstance(blobs["data_0.npy"], pathlib.Path)
+        self.assertIs(blobs["data_5.npy"], kept)
+        with self.assertWarns(UserWarning):
+            self.project.save(self.path, cleanup=False, blob_codec="zstd")
+        expected = [np.full(500, float(i)) for i in range(5)] + [np.full(500, 7.0), np.arange(500.0)]
+        self.assert_lines(replay(self.path)[0][0], expected)
+
+    @unittest.skipIf(jpl3.core._import_pyarrow() is None, "pyarrow is not installed")
+    def test_feather_round_trip(self):
+        # pandas は pyarrow があれば feather で dtype とインデックスごと保存される
+        self.check_pandas_round_trip(".feather")
+
+    def test_npy_round_trip(self):
+        # pyarrow が無い場合、数値と日時だけからなる pandas オブジェクトは .npy の組として保存される
+        with mock.patch("jpl3.core._import_pyarrow", return_value=None):
+            self.check_pandas_round_trip(".npy")
+
+    def test_non_finite_scalars(self):
+        # nan / inf の numpy スカラーは float('nan') 等のリテラルとして再生される
+        values = [np.float64(1.0), np.float64("nan"), np.float32("inf"), np.float64("-inf"), 2.0]
+        self.assert_round_trip((values,), ([0.5, float("nan"), 1.5],))
+        logs = self.project.session.logs.getvalue()
+        self.assertIn("float('nan')", logs)
+        self.assertIn("float('-inf')", logs)
+
+    def check_pandas_round_trip(self, suffix):
+        dates = pd.date_range("2025-01-01", periods=100, name="t")
+        frame = pd.DataFrame(
+            {"a": np.arange(100), "b": np.linspace(0, 1, 100)},
+            index=pd.Index(np.arange(100.0) * 2, name="x"),
+        )
+        self.assert_round_trip(
+            (pd.Series(np.random.rand(100), index=dates, name="s"),),
+            (frame,),
+            (pd.Series(dates), pd.Series(np.arange(100.0))),
+        )
+        self.assertTrue(all(name.endswith(suffix) for name in self.project.session.blobs))
+
+
+class CallFromTest(unittest.TestCase):
+    def test_follows_main_module(self):
+        # IPython の %run のように __main__ が差し替わったら、新しいスクリプトからの呼び出しを記録する
+        project = jpl3.Project()
+        main = sys.modules["__main__"]
+        try:
+            for name in ("s1.py", "s2.py"):
+                path = os.path.abspath(name)
+                module = types.ModuleType("__main__")
+                module.__file__ = path
+                sys.modules["__main__"] = module
+                self.assertEqual(project.figure().call_from, path)
+        finally:
+            sys.modules["__main__"] = main
+            project._cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()